@@ -101,6 +101,7 @@ def train(args):
         True,
         True,
         train_dataset.packing_collate_fn if args.packing_samples else train_dataset.collate_fn,
+        num_workers=args.dataloader_num_workers,
     )
 
     eval_dataloader = strategy.setup_dataloader(
@@ -109,6 +110,7 @@ def train(args):
         True,
         False,
         eval_dataset.packing_collate_fn if args.packing_samples else eval_dataset.collate_fn,
+        num_workers=args.dataloader_num_workers,
     )
 
     # scheduler
@@ -243,6 +245,12 @@ if __name__ == "__main__":
     )
     parser.add_argument("--max_samples", type=int, default=1e8, help="Max number of samples")
     parser.add_argument("--max_len", type=int, default=512)
+    parser.add_argument(
+        "--dataloader_num_workers",
+        type=int,
+        default=4,
+        help="Number of DataLoader worker processes that decode images and run the processor",
+    )
     
     
 
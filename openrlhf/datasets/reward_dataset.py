@@ -1,10 +1,9 @@
 from typing import Callable
 
 import torch
-import torch.nn.functional as F
 from torch.utils.data import Dataset
 
-from .utils import exist_and_not_none, zero_pad_sequences
+from .utils import build_loss_mask, exist_and_not_none, zero_pad_sequences
 from qwen_vl_utils import process_vision_info
 
 
@@ -47,6 +46,14 @@ def preprocess_data(
     return prompt, chosen, rejected, margin
 
 
+def strip_none_fields(messages):
+    # Arrow gives every content entry the union of all fields, filling the missing ones with None
+    # (e.g. "image" on text entries), which would make text entries look like images downstream
+    for message in messages:
+        message["content"] = [{k: v for k, v in m.items() if v is not None} for m in message["content"]]
+    return messages
+
+
 class RewardDataset(Dataset):
     """
     Dataset for reward model
@@ -65,7 +72,7 @@ class RewardDataset(Dataset):
         strategy,
         input_template=None,
         is_dpo=False,
-        num_processors=8,
+        num_processors=None,
         multiple_of=1,
         response_template=None,
     ) -> None:
@@ -75,6 +82,7 @@ class RewardDataset(Dataset):
         self.strategy = strategy
         self.max_length = max_length
         self.multiple_of = multiple_of
+        self.padding_side = "right" if is_dpo else "left"
 
         # chat_template
         self.input_template = input_template
@@ -85,7 +93,14 @@ class RewardDataset(Dataset):
         
         # if there is response_template, mask only the response part at each sequence
         self.response_template = response_template
+        self.response_tokens = None
+        if response_template is not None:
+            self.response_tokens = self.tokenizer(
+                response_template, return_tensors="pt", add_special_tokens=False
+            )["input_ids"].flatten()
         self.eos_token = self.tokenizer.eos_token
+        self.eos_token_id = self.tokenizer.eos_token_id
+        self.pad_token_id = self.tokenizer.pad_token_id
 
         if self.apply_chat_template:
             self.apply_chat_template = self.tokenizer.apply_chat_template
@@ -93,202 +108,147 @@ class RewardDataset(Dataset):
             if tokenizer_chat_template:
                 self.tokenizer.chat_template = tokenizer_chat_template
 
-        # Parallel loading datasets
+        # Batched loading datasets, the fast tokenizer already encodes each batch on multiple threads
+        # so extra map processes mostly add sharding overhead unless num_processors is set explicitly
         processed_dataset = dataset.map(
-            self.process_data, remove_columns=dataset.column_names, num_proc=num_processors
+            self.process_data,
+            batched=True,
+            batch_size=1024,
+            remove_columns=dataset.column_names,
+            num_proc=num_processors,
         )
 
         # Filter out None values if necessary
         processed_dataset = processed_dataset.filter(lambda x: x["prompt"] is not None)
 
-        # Store the processed data in class attributes
-        self.prompts = processed_dataset["prompt"]
-        self.chosens = processed_dataset["chosen"]
-        self.rejects = processed_dataset["reject"]
-        self.extras = processed_dataset["extra"]
-
-    def process_data(self, data):
-        prompt, chosen, reject, margin = preprocess_data(
-            data,
-            self.input_template,
-            self.prompt_key,
-            self.chosen_key,
-            self.rejected_key,
-            self.apply_chat_template,
-            self.is_dpo,
+        # Keep the processed data as a memory-mapped Arrow table rather than materializing it as Python lists,
+        # token ids are returned as tensors and extras as plain Python values
+        self.dataset = processed_dataset.select_columns(["chosen_input_ids", "reject_input_ids", "extra"]).with_format(
+            "torch", columns=["chosen_input_ids", "reject_input_ids"], output_all_columns=True
         )
 
-        if self.is_dpo:
-            prompt_token = self.tokenizer(
-                prompt,
-                max_length=self.max_length,
-                padding=False,
-                truncation=True,
-                return_tensors="pt",
-                add_special_tokens=False,
+    def process_data(self, batch):
+        prompts, chosens, rejects, margins = [], [], [], []
+        for values in zip(*batch.values()):
+            prompt, chosen, reject, margin = preprocess_data(
+                dict(zip(batch.keys(), values)),
+                self.input_template,
+                self.prompt_key,
+                self.chosen_key,
+                self.rejected_key,
+                self.apply_chat_template,
+                self.is_dpo,
             )
-            prompt_ids_len = prompt_token["attention_mask"].int().sum().item()
+            prompts.append(prompt)
+            chosens.append(self._build_sequence(prompt, chosen))
+            rejects.append(self._build_sequence(prompt, reject))
+            margins.append(margin)
+
+        # tokenize the whole batch at once so that __getitem__ only has to build tensors
+        tokenize_kwargs = dict(max_length=self.max_length, padding=False, truncation=True, add_special_tokens=False)
+        chosen_ids = self.tokenizer(chosens, **tokenize_kwargs)["input_ids"]
+        reject_ids = self.tokenizer(rejects, **tokenize_kwargs)["input_ids"]
+
+        # to avoid EOS_token truncation
+        for ids in chosen_ids + reject_ids:
+            ids[-1] = self.eos_token_id
+
+        if self.is_dpo:
+            prompt_ids_lens = [len(ids) for ids in self.tokenizer(prompts, **tokenize_kwargs)["input_ids"]]
 
             # Filter the sample whose length is greater than max_length (2 for answer length)
-            if prompt_ids_len >= self.max_length - 2:
-                prompt = None
+            prompts = [
+                None if prompt_ids_len >= self.max_length - 2 else prompt
+                for prompt, prompt_ids_len in zip(prompts, prompt_ids_lens)
+            ]
 
         return {
-            "prompt": prompt,
-            "chosen": chosen,
-            "reject": reject,
-            "extra": prompt_ids_len if self.is_dpo else margin,
+            "prompt": prompts,
+            "chosen_input_ids": chosen_ids,
+            "reject_input_ids": reject_ids,
+            "extra": prompt_ids_lens if self.is_dpo else margins,
         }
 
+    def _build_sequence(self, prompt, response):
+        sequence = (prompt + response).rstrip("\n")
+        if not sequence.endswith(self.eos_token):
+            sequence += " " + self.eos_token
+        return sequence
+
     def __len__(self):
-        length = len(self.chosens)
+        length = len(self.dataset)
         return length
 
     def __getitem__(self, idx):
-        prompt, chosen, reject, extra = self.prompts[idx], self.chosens[idx], self.rejects[idx], self.extras[idx]
-
-        chosen = (prompt + chosen).rstrip("\n")
-        if not chosen.endswith(self.tokenizer.eos_token):
-            chosen += " " + self.tokenizer.eos_token
-        chosen_token = self.tokenizer(
-            chosen,
-            max_length=self.max_length,
-            padding=False,
-            truncation=True,
-            return_tensors="pt",
-            add_special_tokens=False,
-        )
+        row = self.dataset[idx]
+        chosen_ids, reject_ids, extra = row["chosen_input_ids"], row["reject_input_ids"], row["extra"]
 
-        reject = (prompt + reject).rstrip("\n")
-        if not reject.endswith(self.tokenizer.eos_token):
-            reject += " " + self.tokenizer.eos_token
-        reject_token = self.tokenizer(
-            reject,
-            max_length=self.max_length,
-            padding=False,
-            truncation=True,
-            return_tensors="pt",
-            add_special_tokens=False,
-        )
+        # sequences are tokenized without padding, so every token is attended
+        chosen_mask = torch.ones_like(chosen_ids)
+        reject_mask = torch.ones_like(reject_ids)
 
-        # to avoid EOS_token truncation
-        chosen_token["input_ids"][0][-1] = self.tokenizer.eos_token_id
-        reject_token["input_ids"][0][-1] = self.tokenizer.eos_token_id
-        chosen_token["attention_mask"][0][-1] = True
-        reject_token["attention_mask"][0][-1] = True
-        
-        chosen_loss_mask = torch.zeros_like(chosen_token["input_ids"])
-        reject_loss_mask = torch.zeros_like(reject_token["input_ids"])
         if self.response_template is not None:
-            response_tokens = self.tokenizer(self.response_template, return_tensors="pt", add_special_tokens=False)["input_ids"].flatten()
-            for i in range(len(chosen_token["input_ids"])):
-                for id in torch.where(chosen_token["input_ids"][i].flatten() == response_tokens[0])[0]:
-                    # print("chosen_tokens", chosen_token["input_ids"][i][id:id+len(response_tokens)].flatten() )
-                    # print("response_tokens", response_tokens)
-                    # print("chosen_tokens == response_tokens", chosen_token["input_ids"][i][id:id+len(response_tokens)].flatten() == response_tokens)
-                    if len(chosen_token["input_ids"][i][id:id+len(response_tokens)].flatten()) == len(response_tokens) and torch.all(chosen_token["input_ids"][i][id:id+len(response_tokens)].flatten() == response_tokens):
-                        start_id = id + len(response_tokens)
-                        # print("found a match")
-                    else:
-                        continue
-                    # end_id = None
-                    for j in range(start_id, len(chosen_token["input_ids"][i])):
-                        if chosen_token["input_ids"][i][j] == self.tokenizer.eos_token_id:
-                            end_id = j
-                            break
-                    chosen_loss_mask[i][start_id:end_id+1] = 1
-            
-            for i in range(len(reject_token["input_ids"])):
-                for id in torch.where(reject_token["input_ids"][i].flatten()  == response_tokens[0])[0]:
-                    if len(reject_token["input_ids"][i][id:id+len(response_tokens)].flatten()) == len(response_tokens) and torch.all(reject_token["input_ids"][i][id:id+len(response_tokens)].flatten() == response_tokens):
-                        start_id = id + len(response_tokens)
-                    else:
-                        continue
-                    end_id = None
-                    for j in range(start_id, len(reject_token["input_ids"][i])):
-                        if reject_token["input_ids"][i][j] == self.tokenizer.eos_token_id:
-                            end_id = j
-                            break
-                    reject_loss_mask[i][start_id:end_id+1] = 1
-                        
+            chosen_loss_mask = build_loss_mask(chosen_ids, self.response_tokens, self.eos_token_id)
+            reject_loss_mask = build_loss_mask(reject_ids, self.response_tokens, self.eos_token_id)
+
             # print(f"Fraction of tokens masked: {chosen_loss_mask.sum().item() / chosen_loss_mask.numel()}")
             # print(f"Fraction of tokens masked: {reject_loss_mask.sum().item() / reject_loss_mask.numel()}")
         else:
-            chosen_loss_mask = chosen_token["attention_mask"]
-            reject_loss_mask = reject_token["attention_mask"]
+            chosen_loss_mask = chosen_mask
+            reject_loss_mask = reject_mask
             
             
 
         return (
-            chosen_token["input_ids"],
-            chosen_token["attention_mask"],
-            reject_token["input_ids"],
-            reject_token["attention_mask"],
+            chosen_ids,
+            chosen_mask,
+            reject_ids,
+            reject_mask,
             chosen_loss_mask,
             reject_loss_mask,
             extra,
         )
 
     def collate_fn(self, item_list):
-        chosen_ids = []
-        chosen_masks = []
-        reject_ids = []
-        rejects_masks = []
-        extras = []
-        chosen_loss_masks = []
-        reject_loss_masks = []
-        for chosen_id, chosen_mask, reject_id, rejects_mask, chosen_loss_mask, rejected_loss_mask,  extra in item_list:
-            chosen_ids.append(chosen_id)
-            chosen_masks.append(chosen_mask)
-            reject_ids.append(reject_id)
-            rejects_masks.append(rejects_mask)
-            extras.append(extra)
-            chosen_loss_masks.append(chosen_loss_mask)
-            reject_loss_masks.append(rejected_loss_mask)
-
-        if self.is_dpo:
-            padding_side = "right"
-        else:
-            padding_side = "left"
-        chosen_ids = zero_pad_sequences(chosen_ids, side=padding_side, value=self.tokenizer.pad_token_id)
-        chosen_masks = zero_pad_sequences(chosen_masks, side=padding_side)
-        reject_ids = zero_pad_sequences(reject_ids, side=padding_side, value=self.tokenizer.pad_token_id)
-        rejects_masks = zero_pad_sequences(rejects_masks, side=padding_side)
-        chosen_loss_masks = zero_pad_sequences(chosen_loss_masks, side=padding_side)
-        reject_loss_masks = zero_pad_sequences(reject_loss_masks, side=padding_side)
-        return chosen_ids, chosen_masks, reject_ids, rejects_masks, chosen_loss_masks, rejected_loss_mask, extras
+        (
+            chosen_ids,
+            chosen_masks,
+            reject_ids,
+            rejects_masks,
+            chosen_loss_masks,
+            reject_loss_masks,
+            extras,
+        ) = zip(*item_list)
+
+        chosen_ids = zero_pad_sequences(chosen_ids, side=self.padding_side, value=self.pad_token_id)
+        chosen_masks = zero_pad_sequences(chosen_masks, side=self.padding_side)
+        reject_ids = zero_pad_sequences(reject_ids, side=self.padding_side, value=self.pad_token_id)
+        rejects_masks = zero_pad_sequences(rejects_masks, side=self.padding_side)
+        chosen_loss_masks = zero_pad_sequences(chosen_loss_masks, side=self.padding_side)
+        reject_loss_masks = zero_pad_sequences(reject_loss_masks, side=self.padding_side)
+        return chosen_ids, chosen_masks, reject_ids, rejects_masks, chosen_loss_masks, reject_loss_masks, list(extras)
 
     def packing_collate_fn(self, item_list):
-        extras = []
-
-        chosen_ids = []
-        chosen_att_masks = []
-        chosen_seq_lens = []
-        rejected_ids = []
-        rejected_att_masks = []
-        rejected_seq_lens = []
-        index = 1
-        for chosen_id, chosen_mask, reject_id, rejects_mask, extra in item_list:
-            chosen_ids.append(chosen_id.flatten())
-            chosen_att_masks.append(torch.full_like(chosen_id.flatten(), index))
-            chosen_seq_lens.append(len(chosen_id.flatten()))
-            extras.append(extra)
-
-            rejected_ids.append(reject_id.flatten())
-            rejected_att_masks.append(torch.full_like(reject_id.flatten(), index + len(item_list)))
-            rejected_seq_lens.append(len(reject_id.flatten()))
-            index += 1
-
-        packed_input_ids = torch.cat(chosen_ids + rejected_ids, dim=0).unsqueeze(0)
-        packed_attention_masks = torch.cat(chosen_att_masks + rejected_att_masks, dim=0).unsqueeze(0)
-        packed_seq_lens = chosen_seq_lens + rejected_seq_lens
-
-        if self.multiple_of > 1 and packed_input_ids.numel() % self.multiple_of != 0:
-            padding_len = self.multiple_of - (packed_input_ids.numel() % self.multiple_of)
-            packed_input_ids = F.pad(packed_input_ids, (0, padding_len), value=self.tokenizer.pad_token_id)
-            packed_attention_masks = F.pad(packed_attention_masks, (0, padding_len), value=0)
+        chosen_ids, _, rejected_ids, *_, extras = zip(*item_list)
+
+        sequences = chosen_ids + rejected_ids
+        packed_seq_lens = [len(seq) for seq in sequences]
+        total_len = sum(packed_seq_lens)
+        padding_len = 0
+        if self.multiple_of > 1 and total_len % self.multiple_of != 0:
+            padding_len = self.multiple_of - (total_len % self.multiple_of)
+
+        # pack into preallocated buffers whose tail already holds the multiple_of padding
+        packed_input_ids = torch.full((1, total_len + padding_len), self.pad_token_id, dtype=torch.long)
+        torch.cat(sequences, out=packed_input_ids[0, :total_len])
+
+        # chosen sequences are indexed 1..B and rejected ones B+1..2B in the packed attention mask
+        packed_attention_masks = torch.zeros((1, total_len + padding_len), dtype=torch.long)
+        packed_attention_masks[0, :total_len] = torch.arange(1, len(sequences) + 1).repeat_interleave(
+            torch.tensor(packed_seq_lens), output_size=total_len
+        )
 
-        return packed_input_ids, packed_attention_masks, packed_seq_lens, extras
+        return packed_input_ids, packed_attention_masks, packed_seq_lens, list(extras)
 
 
 
@@ -321,6 +281,7 @@ class QwenRewardDataset(Dataset):
         self.strategy = strategy
         self.max_length = max_length
         self.multiple_of = multiple_of
+        self.padding_side = "right" if is_dpo else "left"
 
         # chat_template
         self.input_template = input_template
@@ -331,7 +292,14 @@ class QwenRewardDataset(Dataset):
         
         # if there is response_template, mask only the response part at each sequence
         self.response_template = response_template
+        self.response_tokens = None
+        if response_template is not None:
+            self.response_tokens = self.tokenizer(
+                response_template, return_tensors="pt", add_special_tokens=False
+            )["input_ids"].flatten()
         self.eos_token = self.tokenizer.eos_token
+        self.eos_token_id = self.tokenizer.eos_token_id
+        self.pad_token_id = self.tokenizer.pad_token_id
 
         # Parallel loading datasets
         processed_dataset = dataset.map(
@@ -341,11 +309,8 @@ class QwenRewardDataset(Dataset):
         # Filter out None values if necessary
         processed_dataset = processed_dataset.filter(lambda x: x["prompt"] is not None)
 
-        # Store the processed data in class attributes
-        self.prompts = processed_dataset["prompt"]
-        self.chosens = processed_dataset["chosen"]
-        self.rejects = processed_dataset["reject"]
-        self.extras = processed_dataset["extra"]
+        # Keep the processed data as a memory-mapped Arrow table rather than materializing it as Python lists
+        self.dataset = processed_dataset.select_columns(["chosen", "reject", "chosen_text", "reject_text", "extra"])
 
     def process_data(self, data):
         prompt, chosen, reject, margin = preprocess_data(
@@ -373,42 +338,42 @@ class QwenRewardDataset(Dataset):
             if prompt_ids_len >= self.max_length - 2:
                 prompt = None
 
+        # validate once here, the None fields themselves are re-added by Arrow and stripped in __getitem__
+        for messages in (chosen, reject):
+            for message in messages:
+                for m in message["content"]:
+                    assert m["type"] != "image" or m["image"] is not None, f"Image is None: {m}"
+
+        # the chat template only depends on the messages, so render it once here
+        chosen_text = self.processor.apply_chat_template(
+            strip_none_fields(chosen), tokenize=False, add_generation_prompt=False
+        )
+        reject_text = self.processor.apply_chat_template(
+            strip_none_fields(reject), tokenize=False, add_generation_prompt=False
+        )
+
         return {
             "prompt": prompt,
             "chosen": chosen,
             "reject": reject,
+            "chosen_text": chosen_text,
+            "reject_text": reject_text,
             "extra": prompt_ids_len if self.is_dpo else margin,
         }
 
     def __len__(self):
-        length = len(self.chosens)
+        length = len(self.dataset)
         return length
 
     def __getitem__(self, idx):
-        prompt, chosen, reject, extra = self.prompts[idx], self.chosens[idx], self.rejects[idx], self.extras[idx]
+        row = self.dataset[idx]
+        chosen, reject, extra = row["chosen"], row["reject"], row["extra"]
+        chosen_text, reject_text = row["chosen_text"], row["reject_text"]
 
         # Remove automatically added None entries
-        for d in chosen:
-            for m in d["content"]:
-                if m["type"] == "image":
-                    if "text" in m and m["text"] is None:
-                        del m["text"]
-                    assert m["image"] is not None, f"Image is None: {m}"
-                if "image" in m and m["image"] is None and m["type"] == "text":
-                    del m["image"]
-        for d in reject:
-            for m in d["content"]:
-                if m["type"] == "image":
-                    if "text" in m and m["text"] is None:
-                        del m["text"]
-                    assert m["image"] is not None, f"Image is None: {m}"
-                if "image" in m and m["image"] is None and m["type"] == "text":
-                    del m["image"]                
+        chosen = strip_none_fields(chosen)
+        reject = strip_none_fields(reject)
 
-        chosen_text = self.processor.apply_chat_template(
-        chosen, tokenize=False, add_generation_prompt=False
-        )
-                        
         chosen_image_inputs, _ = process_vision_info(chosen)
         chosen_token = self.processor(
             text=chosen_text,
@@ -439,9 +404,6 @@ class QwenRewardDataset(Dataset):
         #     return_tensors="pt",
         #     add_special_tokens=False,
         # )
-        reject_text = self.processor.apply_chat_template(
-            reject, tokenize=False, add_generation_prompt=False
-        )
         reject_image_inputs, _ = process_vision_info(reject)
         
         reject_token = self.processor(
@@ -453,64 +415,30 @@ class QwenRewardDataset(Dataset):
             return_tensors="pt",
             add_special_tokens=False,
         )
+        chosen_ids, chosen_mask = chosen_token["input_ids"][0], chosen_token["attention_mask"][0]
+        reject_ids, reject_mask = reject_token["input_ids"][0], reject_token["attention_mask"][0]
 
-        # to avoid EOS_token truncation
-        chosen_token["input_ids"][0][-1] = self.tokenizer.eos_token_id
-        reject_token["input_ids"][0][-1] = self.tokenizer.eos_token_id
-        chosen_token["attention_mask"][0][-1] = True
-        reject_token["attention_mask"][0][-1] = True
+        # to avoid EOS_token truncation, the unpadded attention masks are already all ones
+        chosen_ids[-1] = self.eos_token_id
+        reject_ids[-1] = self.eos_token_id
 
-        chosen_loss_mask = torch.zeros_like(chosen_token["input_ids"])
-        reject_loss_mask = torch.zeros_like(reject_token["input_ids"])
         if self.response_template is not None:
-            response_tokens = self.tokenizer(self.response_template, return_tensors="pt", add_special_tokens=False)["input_ids"].flatten()
-            for i in range(len(chosen_token["input_ids"])):
-                for id in torch.where(chosen_token["input_ids"][i].flatten() == response_tokens[0])[0]:
-                    # print("chosen_tokens", chosen_token["input_ids"][i][id:id+len(response_tokens)].flatten() )
-                    # print("response_tokens", response_tokens)
-                    # print("chosen_tokens == response_tokens", chosen_token["input_ids"][i][id:id+len(response_tokens)].flatten() == response_tokens)
-                    if len(chosen_token["input_ids"][i][id:id+len(response_tokens)].flatten()) == len(response_tokens) and torch.all(chosen_token["input_ids"][i][id:id+len(response_tokens)].flatten() == response_tokens):
-                        start_id = id + len(response_tokens)
-                        # print("found a match")
-                    else:
-                        continue
-                    # end_id = None
-                    for j in range(start_id, len(chosen_token["input_ids"][i])):
-                        if chosen_token["input_ids"][i][j] == self.tokenizer.eos_token_id:
-                            end_id = j
-                            break
-                    if end_id is None:
-                        end_id = len(chosen_token["input_ids"][i]) - 1
-                    chosen_loss_mask[i][start_id:end_id+1] = 1
-            
-            for i in range(len(reject_token["input_ids"])):
-                for id in torch.where(reject_token["input_ids"][i].flatten()  == response_tokens[0])[0]:
-                    if len(reject_token["input_ids"][i][id:id+len(response_tokens)].flatten()) == len(response_tokens) and torch.all(reject_token["input_ids"][i][id:id+len(response_tokens)].flatten() == response_tokens):
-                        start_id = id + len(response_tokens)
-                    else:
-                        continue
-                    end_id = None
-                    for j in range(start_id, len(reject_token["input_ids"][i])):
-                        if reject_token["input_ids"][i][j] == self.tokenizer.eos_token_id:
-                            end_id = j
-                            break
-                    if end_id is None:
-                        end_id = len(reject_token["input_ids"][i]) - 1
-                    reject_loss_mask[i][start_id:end_id+1] = 1
-                        
+            chosen_loss_mask = build_loss_mask(chosen_ids, self.response_tokens, self.eos_token_id)
+            reject_loss_mask = build_loss_mask(reject_ids, self.response_tokens, self.eos_token_id)
+
             # print(f"Fraction of tokens masked: {chosen_loss_mask.sum().item() / chosen_loss_mask.numel()}")
             # print(f"Fraction of tokens masked: {reject_loss_mask.sum().item() / reject_loss_mask.numel()}")
         else:
-            chosen_loss_mask = chosen_token["attention_mask"]
-            reject_loss_mask = reject_token["attention_mask"]
+            chosen_loss_mask = chosen_mask
+            reject_loss_mask = reject_mask
 
         
             
         return (
-            chosen_token["input_ids"],
-            chosen_token["attention_mask"],
-            reject_token["input_ids"],
-            reject_token["attention_mask"],
+            chosen_ids,
+            chosen_mask,
+            reject_ids,
+            reject_mask,
             chosen_loss_mask,
             reject_loss_mask,
             chosen_token["pixel_values"],
@@ -521,88 +449,45 @@ class QwenRewardDataset(Dataset):
         )
 
     def collate_fn(self, item_list):
-        chosen_ids = []
-        chosen_masks = []
-        reject_ids = []
-        rejects_masks = []
-        chosen_loss_masks = []
-        reject_loss_masks = []
-        extras = []
-        chosen_pixel_values = []
-        reject_pixel_values = []
-        chosen_image_thw_list = []
-        reject_image_thw_list = []
-        for chosen_id, chosen_mask, reject_id, rejects_mask, chosen_loss_mask, reject_loss_mask, chosen_pixel_value, rejected_pixel_value,  chosen_image_thw, reject_image_thw, extra in item_list:
-            chosen_ids.append(chosen_id)
-            chosen_masks.append(chosen_mask)
-            reject_ids.append(reject_id)
-            rejects_masks.append(rejects_mask)
-            chosen_loss_masks.append(chosen_loss_mask)
-            reject_loss_masks.append(reject_loss_mask)
-            extras.append(extra)
-            chosen_pixel_values.append(chosen_pixel_value)
-            reject_pixel_values.append(rejected_pixel_value)
-            chosen_image_thw_list.append(chosen_image_thw)
-            reject_image_thw_list.append(reject_image_thw)
-        # for chosen_id, chosen_mask, reject_id, rejects_mask, _, _, extra in item_list:
-        #     chosen_ids.append(chosen_id)
-        #     chosen_masks.append(chosen_mask)
-        #     reject_ids.append(reject_id)
-        #     rejects_masks.append(rejects_mask)
-        #     extras.append(extra)
-
-
-        if self.is_dpo:
-            padding_side = "right"
-        else:
-            padding_side = "left"
-        chosen_ids = zero_pad_sequences(chosen_ids, side=padding_side, value=self.tokenizer.pad_token_id)
-        chosen_masks = zero_pad_sequences(chosen_masks, side=padding_side)
-        reject_ids = zero_pad_sequences(reject_ids, side=padding_side, value=self.tokenizer.pad_token_id)
-        rejects_masks = zero_pad_sequences(rejects_masks, side=padding_side)
-        chosen_loss_masks = zero_pad_sequences(chosen_loss_masks, side=padding_side)
-        reject_loss_masks = zero_pad_sequences(reject_loss_masks, side=padding_side)
+        (
+            chosen_ids,
+            chosen_masks,
+            reject_ids,
+            rejects_masks,
+            chosen_loss_masks,
+            reject_loss_masks,
+            chosen_pixel_values,
+            reject_pixel_values,
+            chosen_image_thw,
+            reject_image_thw,
+            extras,
+        ) = zip(*item_list)
+
+        chosen_ids = zero_pad_sequences(chosen_ids, side=self.padding_side, value=self.pad_token_id)
+        chosen_masks = zero_pad_sequences(chosen_masks, side=self.padding_side)
+        reject_ids = zero_pad_sequences(reject_ids, side=self.padding_side, value=self.pad_token_id)
+        rejects_masks = zero_pad_sequences(rejects_masks, side=self.padding_side)
+        chosen_loss_masks = zero_pad_sequences(chosen_loss_masks, side=self.padding_side)
+        reject_loss_masks = zero_pad_sequences(reject_loss_masks, side=self.padding_side)
         chosen_pixel_values = torch.concatenate(chosen_pixel_values, dim=0)
         reject_pixel_values = torch.concatenate(reject_pixel_values, dim=0)
-        chosen_image_thw = torch.concatenate(chosen_image_thw_list, dim=0)
-        reject_image_thw = torch.concatenate(reject_image_thw_list, dim=0)
-        
-        # return chosen_ids, chosen_masks, reject_ids, rejects_masks, chosen_masks, rejects_masks, extras
+        chosen_image_thw = torch.concatenate(chosen_image_thw, dim=0)
+        reject_image_thw = torch.concatenate(reject_image_thw, dim=0)
 
-        return chosen_ids, chosen_masks, reject_ids, rejects_masks, chosen_loss_masks, reject_loss_masks, chosen_pixel_values, reject_pixel_values, chosen_image_thw, reject_image_thw, extras
-        
-        # chosen_loss_masks = zero_pad_sequences(chosen_loss_masks, side=padding_side)
-        # reject_loss_masks = zero_pad_sequences(reject_loss_masks, side=padding_side)
-        # return chosen_ids, chosen_masks, reject_ids, rejects_masks, chosen_loss_masks, rejected_loss_mask, extras
+        return (
+            chosen_ids,
+            chosen_masks,
+            reject_ids,
+            rejects_masks,
+            chosen_loss_masks,
+            reject_loss_masks,
+            chosen_pixel_values,
+            reject_pixel_values,
+            chosen_image_thw,
+            reject_image_thw,
+            list(extras),
+        )
 
     def packing_collate_fn(self, item_list):
-        extras = []
-
-        chosen_ids = []
-        chosen_att_masks = []
-        chosen_seq_lens = []
-        rejected_ids = []
-        rejected_att_masks = []
-        rejected_seq_lens = []
-        index = 1
-        for chosen_id, chosen_mask, reject_id, rejects_mask, extra in item_list:
-            chosen_ids.append(chosen_id.flatten())
-            chosen_att_masks.append(torch.full_like(chosen_id.flatten(), index))
-            chosen_seq_lens.append(len(chosen_id.flatten()))
-            extras.append(extra)
-
-            rejected_ids.append(reject_id.flatten())
-            rejected_att_masks.append(torch.full_like(reject_id.flatten(), index + len(item_list)))
-            rejected_seq_lens.append(len(reject_id.flatten()))
-            index += 1
-
-        packed_input_ids = torch.cat(chosen_ids + rejected_ids, dim=0).unsqueeze(0)
-        packed_attention_masks = torch.cat(chosen_att_masks + rejected_att_masks, dim=0).unsqueeze(0)
-        packed_seq_lens = chosen_seq_lens + rejected_seq_lens
-
-        if self.multiple_of > 1 and packed_input_ids.numel() % self.multiple_of != 0:
-            padding_len = self.multiple_of - (packed_input_ids.numel() % self.multiple_of)
-            packed_input_ids = F.pad(packed_input_ids, (0, padding_len), value=self.tokenizer.pad_token_id)
-            packed_attention_masks = F.pad(packed_attention_masks, (0, padding_len), value=0)
-
-        return packed_input_ids, packed_attention_masks, packed_seq_lens, extras
+        # packed batches carry no pixel_values / image_grid_thw, so the image tokens would be trained on as text
+        raise NotImplementedError("packing_samples is not supported for multimodal reward datasets")
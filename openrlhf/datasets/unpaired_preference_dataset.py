@@ -3,7 +3,7 @@ from typing import Callable
 import torch
 from torch.utils.data import Dataset
 
-from .utils import zero_pad_sequences
+from .utils import build_loss_mask, zero_pad_sequences
 
 
 def preprocess_data(
@@ -60,6 +60,11 @@ class UnpairedPreferenceDataset(Dataset):
 
         # if there is response_template, mask only the response part at each sequence
         self.response_template = response_template
+        self.response_tokens = None
+        if response_template is not None:
+            self.response_tokens = self.tokenizer(
+                response_template, return_tensors="pt", add_special_tokens=False
+            )["input_ids"].flatten()
 
         if self.apply_chat_template:
             self.apply_chat_template = self.tokenizer.apply_chat_template
@@ -121,26 +126,10 @@ class UnpairedPreferenceDataset(Dataset):
                 add_special_tokens=False,
             )
 
-            loss_mask = torch.zeros_like(inputs["input_ids"])
             if self.response_template is not None:
-                response_tokens = self.tokenizer(self.response_template, return_tensors="pt", add_special_tokens=False)["input_ids"].flatten()
-                for i in range(len(inputs["input_ids"])):
-                    for id in torch.where(inputs["input_ids"][i].flatten() == response_tokens[0])[0]:
-                        # print("chosen_tokens", chosen_token["input_ids"][i][id:id+len(response_tokens)].flatten() )
-                        # print("response_tokens", response_tokens)
-                        # print("chosen_tokens == response_tokens", chosen_token["input_ids"][i][id:id+len(response_tokens)].flatten() == response_tokens)
-                        if torch.all(inputs["input_ids"][i][id:id+len(response_tokens)].flatten() == response_tokens):
-                            start_id = id + len(response_tokens)
-                            # print("found a match")
-                        else:
-                            continue
-                        # end_id = None
-                        for j in range(start_id, len(inputs["input_ids"][i])):
-                            if inputs["input_ids"][i][j] == self.tokenizer.eos_token_id:
-                                end_id = j
-                                break
-                        loss_mask[i][start_id:end_id+1] = 1
-                
+                loss_mask = build_loss_mask(
+                    inputs["input_ids"][0], self.response_tokens, self.tokenizer.eos_token_id
+                ).unsqueeze(0)
             else:
                 loss_mask = inputs["attention_mask"]
 
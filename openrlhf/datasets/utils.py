@@ -1,9 +1,21 @@
+import numpy as np
 import torch
 import torch.nn.functional as F
+from torch.nn.utils.rnn import pad_sequence
+
+try:
+    import numba
+except ImportError:
+    numba = None
 
 
 def zero_pad_sequences(sequences, side: str = "left", value=0):
     assert side in ("left", "right")
+    if all(seq.dim() == 1 for seq in sequences):
+        # 1-D sequences are padded in a single call, left padding works on the reversed sequences
+        if side == "left":
+            return pad_sequence([seq.flip(0) for seq in sequences], batch_first=True, padding_value=value).flip(1)
+        return pad_sequence(sequences, batch_first=True, padding_value=value)
     max_len = max(seq.size(-1) for seq in sequences)
     padded_sequences = []
     for seq in sequences:
@@ -15,3 +27,61 @@ def zero_pad_sequences(sequences, side: str = "left", value=0):
 
 def exist_and_not_none(d, key):
     return key in d and not d[key] is None
+
+
+def build_loss_mask(input_ids: torch.Tensor, response_tokens: torch.Tensor, eos_token_id: int) -> torch.Tensor:
+    # mask the tokens after each occurrence of response_tokens, up to and including the next EOS
+    if numba is not None and input_ids.device.type == "cpu":
+        return torch.from_numpy(_build_loss_mask_numba(input_ids.numpy(), response_tokens.numpy(), eos_token_id))
+    return _build_loss_mask_torch(input_ids, response_tokens, eos_token_id)
+
+
+def _build_loss_mask_torch(input_ids: torch.Tensor, response_tokens: torch.Tensor, eos_token_id: int) -> torch.Tensor:
+    seq_len = input_ids.size(0)
+    response_len = response_tokens.size(0)
+    if seq_len < response_len:
+        return torch.zeros_like(input_ids, dtype=torch.bool)
+
+    # match every window of the sequence against the template at once
+    windows = input_ids.unfold(0, response_len, 1)
+    starts = (windows == response_tokens).all(dim=1).nonzero().flatten() + response_len
+
+    # each response ends at the next EOS, or at the last token if there is none
+    eos_positions = (input_ids == eos_token_id).nonzero().flatten()
+    last_position = torch.full([1], seq_len - 1, dtype=eos_positions.dtype, device=eos_positions.device)
+    eos_positions = torch.cat([eos_positions, last_position])
+    ends = eos_positions[torch.searchsorted(eos_positions, starts).clamp(max=eos_positions.size(0) - 1)]
+
+    # +1 at every start and -1 right after every end, the running sum is then positive inside any response
+    boundaries = torch.zeros(seq_len + 1, dtype=starts.dtype, device=input_ids.device)
+    boundaries.scatter_add_(0, starts, torch.ones_like(starts))
+    boundaries.scatter_add_(0, ends + 1, -torch.ones_like(ends))
+    return boundaries.cumsum(0)[:seq_len] > 0
+
+
+if numba is not None:
+
+    @numba.njit(cache=True, boundscheck=False)
+    def _build_loss_mask_numba(input_ids, response_tokens, eos_token_id):
+        # single pass over the sequence, cheaper than dispatching tensor ops for short dataloader samples
+        seq_len = input_ids.size
+        response_len = response_tokens.size
+        mask = np.zeros(seq_len, dtype=np.bool_)
+        i = 0
+        while i <= seq_len - response_len:
+            matched = True
+            for k in range(response_len):
+                if input_ids[i + k] != response_tokens[k]:
+                    matched = False
+                    break
+            if not matched:
+                i += 1
+                continue
+
+            end = i + response_len
+            while end < seq_len and input_ids[end] != eos_token_id:
+                end += 1
+            mask[i + response_len : end + 1] = True
+            # matches that start and end before this EOS only cover tokens that are already masked
+            i = max(i + 1, end - response_len + 1)
+        return mask
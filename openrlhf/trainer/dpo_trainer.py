@@ -138,12 +138,12 @@ class DPOTrainer(ABC):
             for data in self.train_dataloader:
                 if not self.packing_samples:
                     chosen_ids, c_mask, reject_ids, r_mask, c_loss_mask, r_loss_mask, prompt_id_lens = data
-                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device())
-                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device())
-                    c_loss_mask = c_loss_mask.squeeze(1).to(torch.cuda.current_device())
-                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device())
-                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device())
-                    r_loss_mask = r_loss_mask.squeeze(1).to(torch.cuda.current_device())
+                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    c_loss_mask = c_loss_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    r_loss_mask = r_loss_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
 
                     chosen_logps, rejected_logps, aux_loss, nll_loss = self.concatenated_forward(
                         self.model, chosen_ids, c_mask, reject_ids, r_mask,  c_loss_mask, r_loss_mask ,prompt_id_lens,
@@ -155,8 +155,8 @@ class DPOTrainer(ABC):
                 else:
                     packed_input_ids, packed_attention_masks, packed_seq_lens, prompt_id_lens = data
                     packed_input_ids, packed_attention_masks = packed_input_ids.to(
-                        torch.cuda.current_device()
-                    ), packed_attention_masks.to(torch.cuda.current_device())
+                        torch.cuda.current_device(), non_blocking=True
+                    ), packed_attention_masks.to(torch.cuda.current_device(), non_blocking=True)
                     chosen_logps, rejected_logps, aux_loss, nll_loss = self.packed_samples_forward(
                         self.model, packed_input_ids, packed_attention_masks, packed_seq_lens, prompt_id_lens
                     )
@@ -257,12 +257,12 @@ class DPOTrainer(ABC):
             for data in eval_dataloader:
                 if not self.packing_samples:
                     chosen_ids, c_mask, reject_ids, r_mask, c_loss_mask, r_loss_mask, prompt_id_lens = data
-                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device())
-                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device())
-                    c_loss_mask = c_loss_mask.squeeze(1).to(torch.cuda.current_device())
-                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device())
-                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device())
-                    r_loss_mask = r_loss_mask.squeeze(1).to(torch.cuda.current_device())
+                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    c_loss_mask = c_loss_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    r_loss_mask = r_loss_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
 
                     chosen_logps, rejected_logps, aux_loss, _ = self.concatenated_forward(
                         self.model, chosen_ids, c_mask, reject_ids, r_mask, c_loss_mask, r_loss_mask, prompt_id_lens
@@ -274,8 +274,8 @@ class DPOTrainer(ABC):
                 else:
                     packed_input_ids, packed_attention_masks, packed_seq_lens, prompt_id_lens = data
                     packed_input_ids, packed_attention_masks = packed_input_ids.to(
-                        torch.cuda.current_device()
-                    ), packed_attention_masks.to(torch.cuda.current_device())
+                        torch.cuda.current_device(), non_blocking=True
+                    ), packed_attention_masks.to(torch.cuda.current_device(), non_blocking=True)
                     chosen_logps, rejected_logps, aux_loss, _ = self.packed_samples_forward(
                         self.model, packed_input_ids, packed_attention_masks, packed_seq_lens, prompt_id_lens
                     )
@@ -350,7 +350,7 @@ class DPOTrainer(ABC):
                 pad_size = list(tensor.shape)
                 pad_size[dim] = length - tensor.size(dim)
                 return torch.cat(
-                    [tensor, pad_value * torch.ones(*pad_size, dtype=tensor.dtype, device=tensor.device)], dim=dim
+                    [tensor, torch.full(pad_size, pad_value, dtype=tensor.dtype, device=tensor.device)], dim=dim
                 )
 
         max_length = max(chosen_ids.shape[1], reject_ids.shape[1])
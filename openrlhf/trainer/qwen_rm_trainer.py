@@ -130,14 +130,14 @@ class QwenRewardModelTrainer(ABC):
             for data in self.train_dataloader:
                 if not self.packing_samples:
                     chosen_ids, c_mask, reject_ids, r_mask, _, _, chosen_pixel_values, rejected_pixel_values, chosen_image_thw, rejected_image_thw, margin = data
-                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device())
-                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device())
-                    chosen_pixel_values = chosen_pixel_values.to(torch.cuda.current_device())
-                    rejected_pixel_values = rejected_pixel_values.to(torch.cuda.current_device())
-                    chosen_image_thw = chosen_image_thw.to(torch.cuda.current_device())
-                    rejected_image_thw = rejected_image_thw.to(torch.cuda.current_device())
-                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device())
-                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device())
+                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    chosen_pixel_values = chosen_pixel_values.to(torch.cuda.current_device(), non_blocking=True)
+                    rejected_pixel_values = rejected_pixel_values.to(torch.cuda.current_device(), non_blocking=True)
+                    chosen_image_thw = chosen_image_thw.to(torch.cuda.current_device(), non_blocking=True)
+                    rejected_image_thw = rejected_image_thw.to(torch.cuda.current_device(), non_blocking=True)
+                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
 
                     chosen_reward, reject_reward, aux_loss = self.concatenated_forward(
                         self.model, chosen_ids, c_mask, reject_ids, r_mask, chosen_pixel_values, rejected_pixel_values, chosen_image_thw, rejected_image_thw
@@ -145,8 +145,8 @@ class QwenRewardModelTrainer(ABC):
                 else:
                     packed_input_ids, packed_attention_masks, packed_seq_lens, margin = data
                     packed_input_ids, packed_attention_masks = packed_input_ids.to(
-                        torch.cuda.current_device()
-                    ), packed_attention_masks.to(torch.cuda.current_device())
+                        torch.cuda.current_device(), non_blocking=True
+                    ), packed_attention_masks.to(torch.cuda.current_device(), non_blocking=True)
 
                     chosen_reward, reject_reward, aux_loss = self.packed_samples_forward(
                         self.model, packed_input_ids, packed_attention_masks, packed_seq_lens
@@ -247,14 +247,14 @@ class QwenRewardModelTrainer(ABC):
             for data in eval_dataloader:
                 if not self.packing_samples:
                     chosen_ids, c_mask, reject_ids, r_mask, _, _, chosen_pixel_values, rejected_pixel_values, chosen_image_thw, rejected_image_thw, margin = data
-                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device())
-                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device())
-                    chosen_pixel_values = chosen_pixel_values.to(torch.cuda.current_device())
-                    rejected_pixel_values = rejected_pixel_values.to(torch.cuda.current_device())
-                    chosen_image_thw = chosen_image_thw.to(torch.cuda.current_device())
-                    rejected_image_thw = rejected_image_thw.to(torch.cuda.current_device())
-                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device())
-                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device())
+                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    chosen_pixel_values = chosen_pixel_values.to(torch.cuda.current_device(), non_blocking=True)
+                    rejected_pixel_values = rejected_pixel_values.to(torch.cuda.current_device(), non_blocking=True)
+                    chosen_image_thw = chosen_image_thw.to(torch.cuda.current_device(), non_blocking=True)
+                    rejected_image_thw = rejected_image_thw.to(torch.cuda.current_device(), non_blocking=True)
+                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
 
                     chosen_reward, reject_reward, aux_loss = self.concatenated_forward(
                         self.model, chosen_ids, c_mask, reject_ids, r_mask, chosen_pixel_values, rejected_pixel_values, chosen_image_thw, rejected_image_thw
@@ -262,8 +262,8 @@ class QwenRewardModelTrainer(ABC):
                 else:
                     packed_input_ids, packed_attention_masks, packed_seq_lens, _, _, margin = data
                     packed_input_ids, packed_attention_masks = packed_input_ids.to(
-                        torch.cuda.current_device()
-                    ), packed_attention_masks.to(torch.cuda.current_device())
+                        torch.cuda.current_device(), non_blocking=True
+                    ), packed_attention_masks.to(torch.cuda.current_device(), non_blocking=True)
 
                     chosen_reward, reject_reward, _ = self.packed_samples_forward(
                         self.model, packed_input_ids, packed_attention_masks, packed_seq_lens
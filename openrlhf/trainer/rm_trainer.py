@@ -130,10 +130,10 @@ class RewardModelTrainer(ABC):
             for data in self.train_dataloader:
                 if not self.packing_samples:
                     chosen_ids, c_mask, reject_ids, r_mask, _, _, margin = data
-                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device())
-                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device())
-                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device())
-                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device())
+                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
 
                     chosen_reward, reject_reward, aux_loss = self.concatenated_forward(
                         self.model, chosen_ids, c_mask, reject_ids, r_mask
@@ -141,8 +141,8 @@ class RewardModelTrainer(ABC):
                 else:
                     packed_input_ids, packed_attention_masks, packed_seq_lens, margin = data
                     packed_input_ids, packed_attention_masks = packed_input_ids.to(
-                        torch.cuda.current_device()
-                    ), packed_attention_masks.to(torch.cuda.current_device())
+                        torch.cuda.current_device(), non_blocking=True
+                    ), packed_attention_masks.to(torch.cuda.current_device(), non_blocking=True)
 
                     chosen_reward, reject_reward, aux_loss = self.packed_samples_forward(
                         self.model, packed_input_ids, packed_attention_masks, packed_seq_lens
@@ -243,10 +243,10 @@ class RewardModelTrainer(ABC):
             for data in eval_dataloader:
                 if not self.packing_samples:
                     chosen_ids, c_mask, reject_ids, r_mask, _, _, margin, = data
-                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device())
-                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device())
-                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device())
-                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device())
+                    chosen_ids = chosen_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    c_mask = c_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    reject_ids = reject_ids.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
+                    r_mask = r_mask.squeeze(1).to(torch.cuda.current_device(), non_blocking=True)
 
                     chosen_reward, reject_reward, _ = self.concatenated_forward(
                         self.model, chosen_ids, c_mask, reject_ids, r_mask
@@ -254,8 +254,8 @@ class RewardModelTrainer(ABC):
                 else:
                     packed_input_ids, packed_attention_masks, packed_seq_lens, _, _, margin = data
                     packed_input_ids, packed_attention_masks = packed_input_ids.to(
-                        torch.cuda.current_device()
-                    ), packed_attention_masks.to(torch.cuda.current_device())
+                        torch.cuda.current_device(), non_blocking=True
+                    ), packed_attention_masks.to(torch.cuda.current_device(), non_blocking=True)
 
                     chosen_reward, reject_reward, _ = self.packed_samples_forward(
                         self.model, packed_input_ids, packed_attention_masks, packed_seq_lens
@@ -76,6 +76,7 @@ setup(
     extras_require={
         "vllm": ["vllm==0.6.5"],
         "vllm_latest": ["vllm>0.6.5"],
+        "numba": ["numba"],
     },
     python_requires=">=3.10",
     classifiers=[